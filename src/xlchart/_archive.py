@@ -0,0 +1,81 @@
+import shutil
+import tempfile
+import zipfile
+from os import PathLike
+from pathlib import Path, PurePosixPath, PureWindowsPath
+from typing import Callable, Iterator, Sequence
+
+from ._watch import LOCK_PREFIX
+
+
+def _is_archive(file_path: str | PathLike) -> bool:
+    # ワークブックも ZIP 形式なので拡張子で判定する
+    p = Path(file_path)
+    return p.is_file() and p.suffix.lower() == ".zip"
+
+
+def _archive_output_dir(archive: str | PathLike) -> Path:
+    # class.zip の結果は class/ 以下にメンバーのパスと同じ構造で出力する
+    return Path(archive).with_suffix("")
+
+
+def _archive_members(archive: str | PathLike) -> dict[str, int]:
+
+    # ワークブックのメンバーのパスと展開後のサイズ
+    # ロックファイル，macOS のメタデータ，ディレクトリの外を指すパスは除く
+
+    members = dict()
+    with zipfile.ZipFile(archive) as z:
+        for info in z.infolist():
+            if info.is_dir():
+                continue
+            p = PurePosixPath(info.filename)
+            if p.suffix.lower() != ".xlsx" or p.name.startswith(LOCK_PREFIX):
+                continue
+            if p.parts[0] == "__MACOSX" or p.is_absolute() or ".." in p.parts:
+                continue
+            # C:/x/hw.xlsx のようなドライブ付きのパスも除く
+            if PureWindowsPath(info.filename).drive:
+                continue
+            members[info.filename] = info.file_size
+    return dict(sorted(members.items()))
+
+
+def _extract_members(
+    archive: str | PathLike,
+    members: Sequence[str],
+    output_dir: Path,
+) -> Iterator[tuple[Path, Callable[[], Path]]]:
+
+    # メンバーごとに (出力先を決めるためのパス, 一時ファイルに展開する関数) を返す
+    # Excel はファイルしか開けないので，ひとつずつ一時ファイルに展開し，処理が終わったら削除する
+
+    scratch = tempfile.TemporaryDirectory(prefix="xlchart-", ignore_cleanup_errors=True)
+    scratch_dir = Path(scratch.name)
+    try:
+        with zipfile.ZipFile(archive) as z:
+            for i, member in enumerate(members):
+                p = PurePosixPath(member)
+                target_book = output_dir.joinpath(*p.parts)
+                # 別のディレクトリにある同じ名前のワークブック（alice/hw.xlsx と bob/hw.xlsx など）が
+                # 作業ディレクトリで上書きされないように番号を付ける
+                local_book = scratch_dir.joinpath(f"{i}_{p.name}")
+
+                # 出力先のディレクトリは展開するときに作るので，失敗してもそのメンバーだけのエラーになる
+                def extract(
+                    member: str = member, target_book: Path = target_book, local_book: Path = local_book
+                ) -> Path:
+                    # リンクなどで output_dir の外を指す場合は展開しない
+                    if not target_book.resolve().is_relative_to(output_dir.resolve()):
+                        raise ValueError(f"Invalid member path: {member}")
+                    target_book.parent.mkdir(parents=True, exist_ok=True)
+                    with z.open(member) as src, local_book.open("wb") as dst:
+                        shutil.copyfileobj(src, dst, 1024 * 1024)
+                    return local_book
+
+                try:
+                    yield target_book, extract
+                finally:
+                    local_book.unlink(missing_ok=True)
+    finally:
+        scratch.cleanup()
@@ -0,0 +1,218 @@
+import json
+import math
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Final, Optional
+
+from ._archive import _archive_members, _archive_output_dir, _extract_members, _is_archive
+from ._cli import _pop_flag, _pop_option
+from ._metrics import Metrics
+from ._prefetch import _prefetch
+from ._schedule import (
+    _book_stats,
+    _estimate_cost,
+    _history_scale,
+    _load_history,
+    _order_by_cost,
+    _record_timing,
+    _save_history,
+)
+from ._shard import _in_shard, _manifest_name, _parse_shard, _shard_key
+from ._watch import _watch_dir
+from ._xlapp import _init_excel, _new_excel, _quit_excel
+
+BATCH_USAGE: Final[str] = (
+    "[--watch] [--metrics <file>] [--prefetch <n>] [--max-size <mb>] [--shard <i>/<n>]"
+    " [--schedule] [--history <file>]"
+)
+
+
+@dataclass
+class BatchOptions:
+    # ディレクトリ処理のオプション
+    watch: bool = False
+    metrics_path: Optional[Path] = None
+    prefetch: int = 0
+    max_size: Optional[int] = None
+    shard: Optional[tuple[int, int]] = None
+    schedule: bool = False
+    history_path: Optional[Path] = None
+
+
+def _pop_batch_options(args: list[str]) -> BatchOptions:
+
+    options = BatchOptions()
+
+    # ディレクトリを監視して追加されたファイルを順次処理する
+    options.watch = _pop_flag(args, "--watch")
+
+    # 処理件数と処理時間を Prometheus 形式で出力する
+    metrics_path = _pop_option(args, "--metrics")
+    if metrics_path is not None:
+        options.metrics_path = Path(metrics_path)
+
+    # 次のワークブックをローカルにコピーしながら処理する
+    prefetch = _pop_option(args, "--prefetch")
+    max_size = _pop_option(args, "--max-size")
+    if prefetch is not None:
+        if not prefetch.isdigit() or int(prefetch) < 1:
+            raise ValueError(f"Invalid value for --prefetch: {prefetch}")
+        options.prefetch = int(prefetch)
+    if max_size is not None:
+        if prefetch is None:
+            raise ValueError("--max-size requires --prefetch")
+        try:
+            size = float(max_size)
+        except ValueError:
+            raise ValueError(f"Invalid value for --max-size: {max_size}")
+        if not math.isfinite(size) or size <= 0:
+            raise ValueError(f"Invalid value for --max-size: {max_size}")
+        options.max_size = int(size * 1024 * 1024)
+
+    # 複数台で分担する場合の担当分
+    shard = _pop_option(args, "--shard")
+    if shard is not None:
+        options.shard = _parse_shard(shard)
+
+    # 時間のかかりそうなワークブックから処理する
+    options.schedule = _pop_flag(args, "--schedule")
+
+    # ワークブックごとの処理時間を記録し，次回の見積もりに使う
+    history_path = _pop_option(args, "--history")
+    if history_path is not None:
+        options.history_path = Path(history_path)
+
+    # 監視モードでは対象のファイルが確定しない
+    if options.watch and options.prefetch > 0:
+        raise ValueError("--prefetch cannot be used with --watch")
+    if options.watch and options.shard is not None:
+        raise ValueError("--shard cannot be used with --watch")
+    if options.watch and options.schedule:
+        raise ValueError("--schedule cannot be used with --watch")
+
+    return options
+
+
+def _run_batch(
+    command: str,
+    target_path: Path,
+    process: Callable[[object, Path, Path, Metrics], None],
+    options: BatchOptions,
+    output_dir: Optional[Path] = None,
+):
+
+    # ひとつの Excel でディレクトリまたは ZIP ファイル内のワークブックを順に処理する
+    # 失敗したワークブックはエラーを表示して次に進む
+    # process には出力先を決めるための元のパスと，実際に開くパスを渡す
+
+    metrics = Metrics(command)
+    status: dict[str, Optional[str]] = dict()
+    history = _load_history(options.history_path)
+    stats: dict[Path, tuple[int, int]] = dict()
+
+    # books: (出力先を決めるためのパス, 実際に開くパスを返す関数) を返すイテレータ
+    # 結果はワークブックの base_dir からの相対パスで記録する
+
+    if _is_archive(target_path):
+        if options.watch or options.prefetch > 0:
+            raise ValueError("--watch and --prefetch cannot be used with a ZIP archive")
+        base_dir = output_dir or _archive_output_dir(target_path)
+        members = _archive_members(target_path)
+        total = len(members)
+        if options.shard is not None:
+            index, count = options.shard
+            members = {m: size for m, size in members.items() if _in_shard(m, index, count)}
+        if options.schedule:
+            # 展開しないとグラフの数はわからないのでサイズだけで見積もる
+            scale = _history_scale(history)
+            members = dict(sorted(members.items(), key=lambda m: -_estimate_cost(m[0], m[1], 0, history, scale)))
+        for m, size in members.items():
+            stats[base_dir.joinpath(m)] = (size, 0)
+        books = _extract_members(target_path, list(members), base_dir)
+        fetch_stage = "extract"
+    else:
+        base_dir = target_path
+        if options.watch:
+            target_books = _watch_dir(target_path)
+            total = None
+        else:
+            target_books = sorted(target_path.glob("*.xlsx"))
+            total = len(target_books)
+            if options.shard is not None:
+                index, count = options.shard
+                target_books = [b for b in target_books if _in_shard(_shard_key(b, target_path), index, count)]
+            if options.schedule:
+                target_books = _order_by_cost(target_books, target_path, history, stats)
+        if options.prefetch > 0:
+            books = _prefetch(target_books, options.prefetch, options.max_size)
+        else:
+            books = ((b, None) for b in target_books)
+        fetch_stage = "prefetch-wait"
+
+    _init_excel()
+    xl = None
+    try:
+        xl = _new_excel()
+        for target_book, fetch in books:
+            print(target_book, file=sys.stderr)
+            key = _shard_key(target_book, base_dir)
+            start = time.perf_counter()
+            try:
+                with metrics.timer("workbook"):
+                    if fetch is not None:
+                        with metrics.timer(fetch_stage):
+                            source_book = fetch()
+                    else:
+                        source_book = target_book
+                    process(xl, target_book, source_book, metrics)
+                metrics.count("workbooks")
+                status[key] = None
+            except Exception as e:
+                metrics.error(e)
+                status[key] = str(e)
+                print(f"Error: {e}", file=sys.stderr)
+            else:
+                if options.history_path is not None:
+                    _record_book(history, key, target_book, stats, time.perf_counter() - start)
+            if options.metrics_path is not None:
+                metrics.write_prometheus(options.metrics_path)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        books.close()
+        if xl is not None:
+            _quit_excel(xl)
+        # 最後に集計結果を出力する
+        if options.metrics_path is not None:
+            metrics.write_prometheus(options.metrics_path)
+            # 拡張子が .json でも Prometheus 形式のファイルを上書きしないように名前を分ける
+            metrics.write_summary(options.metrics_path.with_name(f"{options.metrics_path.stem}.summary.json"))
+        if options.history_path is not None:
+            _save_history(options.history_path, history)
+
+    # 担当分の処理結果を記録し，xlcmerge で結合できるようにする
+    if options.shard is not None:
+        index, count = options.shard
+        manifest = dict()
+        manifest["command"] = command
+        manifest["shard"] = index
+        manifest["shards"] = count
+        manifest["total"] = total
+        manifest["workbooks"] = {key: {"error": error} for key, error in sorted(status.items())}
+        output = (output_dir or base_dir).joinpath(_manifest_name(command, index, count))
+        with output.open("w", encoding="utf-8", newline="\n") as f:
+            json.dump(manifest, f, indent=4, ensure_ascii=False)
+            f.write("\n")
+
+
+def _record_book(history: dict, key: str, target_book: Path, stats: dict, seconds: float):
+    # スケジュールしていない場合はここでファイルサイズとグラフの数を調べる
+    try:
+        if target_book not in stats:
+            stats[target_book] = _book_stats(target_book)
+    except OSError:
+        return
+    size, charts = stats[target_book]
+    _record_timing(history, key, size, charts, seconds)
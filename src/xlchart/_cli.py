@@ -0,0 +1,19 @@
+from typing import Optional
+
+
+def _pop_flag(args: list[str], name: str) -> bool:
+    found = name in args
+    args[:] = [a for a in args if a != name]
+    return found
+
+
+def _pop_option(args: list[str], name: str) -> Optional[str]:
+    # "--name value" 形式のオプションを取り出す
+    if name not in args:
+        return None
+    i = args.index(name)
+    if i + 1 >= len(args):
+        raise ValueError(f"Option requires a value: {name}")
+    value = args[i + 1]
+    del args[i : i + 2]
+    return value
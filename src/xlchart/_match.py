@@ -0,0 +1,152 @@
+from typing import Hashable, Optional, Sequence
+
+# 割り当てなしのコスト
+# 一致する特徴がなくても，採点対象のグラフが残っていれば割り当てる
+UNMATCHED_COST = 2.0
+
+
+def match_charts(target: dict, answer: dict) -> dict[str, Optional[str]]:
+    # 採点基準のグラフと採点対象のグラフを特徴の一致度で最適に対応付ける
+    answer_names = list(answer.keys())
+    target_names = list(target.keys())
+    if not answer_names:
+        return {}
+    if not target_names:
+        return {name: None for name in answer_names}
+
+    target_features = [_chart_features(target[name], name) for name in target_names]
+    cost = list()
+    for name in answer_names:
+        a = _chart_features(answer[name], name)
+        cost.append([_feature_cost(a, t) for t in target_features])
+
+    assignment = _linear_sum_assignment(cost)
+
+    mapping = dict()
+    for i, name in enumerate(answer_names):
+        j = assignment[i]
+        mapping[name] = target_names[j] if j is not None else None
+    return mapping
+
+
+def _feature_cost(answer_features: set, target_features: set) -> float:
+    # 採点基準で指定された特徴のうち一致しなかった割合
+    if not answer_features:
+        return 1.0
+    return 1.0 - len(answer_features & target_features) / len(answer_features)
+
+
+def _chart_features(chart: dict, name: str) -> set[tuple]:
+
+    # 採点で比較するすべてのプロパティを特徴にする
+    features = set()
+
+    features.add(("name", name))
+
+    for prop_name, value in chart.items():
+        if prop_name in ("series", "axis", "bins"):
+            continue
+        features.add((prop_name, _hashable(value)))
+
+    # 系列は index ごとに比較する
+    for i, series in enumerate(chart.get("series", [])):
+        index = series.get("index", i)
+        for prop_name, value in series.items():
+            if prop_name == "index":
+                continue
+            if prop_name == "trendline":
+                for j, trendline in enumerate(value):
+                    for k, v in trendline.items():
+                        features.add(("series", index, "trendline", j, k, _hashable(v)))
+                continue
+            features.add(("series", index, prop_name, _hashable(value)))
+
+    # 軸は type と group ごとに比較する
+    for axis in chart.get("axis", []):
+        axis_type = axis.get("axis-type", 1)
+        axis_group = axis.get("axis-group", 1)
+        for prop_name, value in axis.items():
+            if prop_name in ("axis-type", "axis-group"):
+                continue
+            features.add(("axis", axis_type, axis_group, prop_name, _hashable(value)))
+
+    # ビンは chart-group ごとに比較する
+    for i, bins in enumerate(chart.get("bins", [])):
+        chart_group = bins.get("chart-group", i + 1)
+        for prop_name, value in bins.items():
+            if prop_name == "chart-group":
+                continue
+            features.add(("bins", chart_group, prop_name, _hashable(value)))
+
+    return features
+
+
+def _hashable(value) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _hashable(v)) for k, v in value.items()))
+    return value
+
+
+def _linear_sum_assignment(cost: Sequence[Sequence[float]]) -> list[Optional[int]]:
+
+    # 最短増加路によるハンガリアン法（Jonker-Volgenant 型）
+    # 行数と列数が異なる場合はダミーの行または列で正方行列にする
+    n_rows = len(cost)
+    n_cols = len(cost[0]) if n_rows else 0
+    n = max(n_rows, n_cols)
+
+    def c(i: int, j: int) -> float:
+        if i < n_rows and j < n_cols:
+            return cost[i][j]
+        return UNMATCHED_COST
+
+    inf = float("inf")
+    u = [0.0] * (n + 1)
+    v = [0.0] * (n + 1)
+    p = [0] * (n + 1)  # p[j]: 列 j に割り当てられた行（1 始まり）
+    way = [0] * (n + 1)
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [inf] * (n + 1)
+        used = [False] * (n + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            delta = inf
+            j1 = 0
+            for j in range(1, n + 1):
+                if used[j]:
+                    continue
+                cur = c(i0 - 1, j - 1) - u[i0] - v[j]
+                if cur < minv[j]:
+                    minv[j] = cur
+                    way[j] = j0
+                if minv[j] < delta:
+                    delta = minv[j]
+                    j1 = j
+            for j in range(n + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while True:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+            if j0 == 0:
+                break
+
+    assignment: list[Optional[int]] = [None] * n_rows
+    for j in range(1, n + 1):
+        i = p[j] - 1
+        if i < n_rows and j - 1 < n_cols:
+            assignment[i] = j - 1
+    return assignment
@@ -0,0 +1,126 @@
+import bisect
+import json
+import math
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from os import PathLike
+from pathlib import Path
+from typing import Final, Optional
+
+# ヒストグラムのバケット（秒）
+BUCKETS: Final[tuple[float, ...]] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+
+
+class Metrics:
+
+    # ディレクトリ処理の件数と処理時間を集計する
+
+    def __init__(self, command: str):
+        self.command = command
+        self.started = time.perf_counter()
+        self.counters: dict[str, int] = defaultdict(int)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.buckets: dict[str, list[int]] = defaultdict(lambda: [0] * len(BUCKETS))
+
+    @contextmanager
+    def timer(self, stage: str):
+        # 例外が発生した場合も処理時間を記録する
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage: str, seconds: float):
+        self.samples[stage].append(seconds)
+        self.buckets[stage][bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] += n
+
+    def error(self, e: BaseException):
+        self.errors[type(e).__name__] += 1
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        workbooks = self.counters.get("workbooks", 0)
+        data = dict()
+        data["command"] = self.command
+        data["elapsed"] = elapsed
+        data["workbooks"] = workbooks
+        data["failed"] = sum(self.errors.values())
+        data["workbooks-per-second"] = workbooks / elapsed if elapsed > 0 else 0.0
+        data["counters"] = dict(self.counters)
+        data["errors"] = dict(self.errors)
+        data["stages"] = {stage: _describe(samples) for stage, samples in self.samples.items()}
+        return data
+
+    def prometheus(self) -> str:
+
+        lines = list()
+        label = f'command="{self.command}"'
+
+        lines.append("# TYPE xlchart_run_seconds gauge")
+        lines.append(f"xlchart_run_seconds{{{label}}} {time.perf_counter() - self.started}")
+
+        lines.append("# TYPE xlchart_total counter")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f'xlchart_total{{{label},name="{name}"}} {value}')
+
+        lines.append("# TYPE xlchart_errors_total counter")
+        for name, value in sorted(self.errors.items()):
+            lines.append(f'xlchart_errors_total{{{label},type="{name}"}} {value}')
+
+        lines.append("# TYPE xlchart_stage_seconds histogram")
+        for stage, samples in sorted(self.samples.items()):
+            n = 0
+            for le, c in zip(BUCKETS, self.buckets[stage]):
+                n += c
+                le_str = "+Inf" if math.isinf(le) else str(le)
+                lines.append(f'xlchart_stage_seconds_bucket{{{label},stage="{stage}",le="{le_str}"}} {n}')
+            lines.append(f'xlchart_stage_seconds_sum{{{label},stage="{stage}"}} {sum(samples)}')
+            lines.append(f'xlchart_stage_seconds_count{{{label},stage="{stage}"}} {len(samples)}')
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, file_path: str | PathLike):
+        # node_exporter が書き込み途中のファイルを読まないように置き換える
+        p = Path(file_path)
+        tmp = p.with_name(p.name + ".tmp")
+        with tmp.open("w", encoding="utf-8", newline="\n") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, p)
+
+    def write_summary(self, file_path: str | PathLike):
+        with Path(file_path).open("w", encoding="utf-8", newline="\n") as f:
+            json.dump(self.summary(), f, indent=4, ensure_ascii=False)
+            f.write("\n")
+
+
+def _timer(metrics: Optional[Metrics], stage: str):
+    if metrics is None:
+        return nullcontext()
+    return metrics.timer(stage)
+
+
+def _describe(samples: list[float]) -> dict:
+    s = sorted(samples)
+    data = dict()
+    data["count"] = len(s)
+    data["sum"] = sum(s)
+    data["mean"] = sum(s) / len(s) if s else 0.0
+    data["p50"] = _percentile(s, 0.50)
+    data["p90"] = _percentile(s, 0.90)
+    data["p99"] = _percentile(s, 0.99)
+    data["max"] = s[-1] if s else 0.0
+    return data
+
+
+def _percentile(sorted_samples: list[float], q: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    i = min(len(sorted_samples) - 1, math.ceil(q * len(sorted_samples)) - 1)
+    return sorted_samples[max(i, 0)]
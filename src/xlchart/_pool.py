@@ -0,0 +1,169 @@
+import asyncio
+import queue
+import threading
+from os import PathLike
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterable, Iterator, Optional, TypeVar
+
+from ._schedule import _order_by_cost
+from ._xlapp import _init_excel, _new_excel, _quit_excel
+
+T = TypeVar("T")
+
+# ワーカーの終了を表す
+_DONE = object()
+
+
+def _iter_books(
+    paths: Iterable[str | PathLike],
+    func: Callable[[object, Path], T],
+    workers: int = 1,
+    max_inflight: Optional[int] = None,
+    cancel: Optional[threading.Event] = None,
+    schedule: bool = False,
+    abort: Optional[threading.Event] = None,
+) -> Iterator[tuple[Path, T | Exception]]:
+
+    # workers 個の Excel でワークブックを並列に処理し，終わったものから (path, 結果または例外) を返す
+    # 処理中と未取得の結果の合計が max_inflight を超えないように paths の読み出しを待つ
+    # cancel が設定されるか，呼び出し側が途中でやめた場合は未処理のワークブックを処理しない
+    # abort は非同期版が途中でやめたことを伝えるための内部の Event で，呼び出し側の cancel は変更しない
+
+    if workers < 1:
+        raise ValueError(f"Invalid number of workers: {workers}")
+    if max_inflight is None:
+        max_inflight = workers * 2
+    if max_inflight < 1:
+        raise ValueError(f"Invalid max_inflight: {max_inflight}")
+
+    # 時間のかかりそうなワークブックから処理する
+    if schedule:
+        books = [Path(p) for p in paths]
+        paths = _order_by_cost(books, None, {})
+
+    _init_excel()
+
+    stop = threading.Event()
+    slots = threading.Semaphore(max_inflight)
+    tasks: queue.Queue = queue.Queue()
+    results: queue.Queue = queue.Queue()
+    feed_error: list[BaseException] = []
+
+    def cancelled() -> bool:
+        if stop.is_set():
+            return True
+        return any(e is not None and e.is_set() for e in (cancel, abort))
+
+    def feed():
+        try:
+            for p in paths:
+                # 空きができるまで待つ
+                while not slots.acquire(timeout=0.1):
+                    if cancelled():
+                        return
+                if cancelled():
+                    return
+                tasks.put(Path(p))
+        except BaseException as e:
+            feed_error.append(e)
+        finally:
+            for _ in range(workers):
+                tasks.put(_DONE)
+
+    def work():
+        import pythoncom
+
+        pythoncom.CoInitialize()
+        xl = None
+        error = None
+        try:
+            try:
+                xl = _new_excel()
+            except Exception as e:
+                error = e
+            while True:
+                p = tasks.get()
+                if p is _DONE:
+                    break
+                if cancelled():
+                    slots.release()
+                    continue
+                if error is not None:
+                    results.put((p, error))
+                    continue
+                try:
+                    results.put((p, func(xl, p)))
+                except Exception as e:
+                    results.put((p, e))
+        finally:
+            if xl is not None:
+                _quit_excel(xl)
+            pythoncom.CoUninitialize()
+            results.put(_DONE)
+
+    threads = [threading.Thread(target=feed, name="xlchart-feed", daemon=True)]
+    for i in range(workers):
+        threads.append(threading.Thread(target=work, name=f"xlchart-worker-{i}", daemon=True))
+    for t in threads:
+        t.start()
+
+    try:
+        running = workers
+        while running > 0:
+            item = results.get()
+            if item is _DONE:
+                running -= 1
+                continue
+            # 取得されたら次のワークブックを受け付ける
+            slots.release()
+            if cancelled():
+                continue
+            yield item
+        if feed_error:
+            raise feed_error[0]
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+
+
+async def _aiter_books(
+    paths: Iterable[str | PathLike],
+    func: Callable[[object, Path], T],
+    workers: int = 1,
+    max_inflight: Optional[int] = None,
+    cancel: Optional[threading.Event] = None,
+    schedule: bool = False,
+) -> AsyncIterator[tuple[Path, T | Exception]]:
+
+    # _iter_books の非同期版で，同期版のイテレータを別スレッドで進める
+    # 途中でやめた場合は内部の abort を設定し，処理中のワークブックが終わるのを待ってから Excel を終了する
+    # 呼び出し側の cancel は設定しない
+    # 途中でやめた場合に Excel を確実に終了するため，呼び出し側は contextlib.aclosing を使う
+
+    abort = threading.Event()
+    iterator = _iter_books(paths, func, workers, max_inflight, cancel, schedule, abort)
+
+    lock = threading.Lock()
+    end = object()
+    finished = False
+
+    def step():
+        with lock:
+            return next(iterator, end)
+
+    def close():
+        with lock:
+            iterator.close()
+
+    try:
+        while True:
+            item = await asyncio.to_thread(step)
+            if item is end:
+                finished = True
+                return
+            yield item
+    finally:
+        if not finished:
+            abort.set()
+        await asyncio.to_thread(close)
@@ -0,0 +1,83 @@
+import shutil
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+
+def _prefetch(
+    target_books: Iterable[Path],
+    depth: int,
+    max_size: Optional[int] = None,
+) -> Iterator[tuple[Path, Callable[[], Path]]]:
+
+    # 次の depth 個のワークブックをバックグラウンドでローカルの作業ディレクトリにコピーする
+    # (元のパス, コピーが終わるのを待ってローカルのパスを返す関数) を返す
+    # コピーしたファイルは呼び出し側の処理が終わって次に進むときに削除する
+
+    scratch = tempfile.TemporaryDirectory(prefix="xlchart-", ignore_cleanup_errors=True)
+    scratch_dir = Path(scratch.name)
+    executor = ThreadPoolExecutor(max_workers=depth, thread_name_prefix="xlchart-prefetch")
+    queue: deque[tuple[Path, Future]] = deque()
+    books = iter(target_books)
+    count = 0
+
+    def submit() -> bool:
+        nonlocal count
+        for book in books:
+            # 別のディレクトリにある同じ名前のワークブック（alice/hw.xlsx と bob/hw.xlsx など）が
+            # 作業ディレクトリで上書きされないように番号を付ける
+            local_book = scratch_dir.joinpath(f"{count}_{book.name}")
+            count += 1
+            queue.append((book, executor.submit(_fetch, book, local_book, max_size)))
+            return True
+        return False
+
+    try:
+        for _ in range(depth):
+            if not submit():
+                break
+        while queue:
+            book, future = queue.popleft()
+            submit()
+            try:
+                yield book, future.result
+            finally:
+                _discard(future)
+    finally:
+        for _, future in queue:
+            future.cancel()
+        executor.shutdown(wait=True)
+        for _, future in queue:
+            _discard(future)
+        scratch.cleanup()
+
+
+def _fetch(book: Path, local_book: Path, max_size: Optional[int] = None) -> Path:
+
+    size = book.stat().st_size
+    if max_size is not None and size > max_size:
+        raise ValueError(f"Workbook too large: {book} ({size} bytes)")
+
+    shutil.copyfile(book, local_book)
+
+    # 壊れたファイルを Excel で開くと応答がなくなることがあるので事前に確認する
+    try:
+        with zipfile.ZipFile(local_book) as z:
+            bad = z.testzip()
+    except zipfile.BadZipFile:
+        local_book.unlink(missing_ok=True)
+        raise ValueError(f"Not a valid workbook: {book}")
+    if bad is not None:
+        local_book.unlink(missing_ok=True)
+        raise ValueError(f"Corrupted workbook: {book} ({bad})")
+
+    return local_book
+
+
+def _discard(future: Future):
+    if future.cancelled() or not future.done() or future.exception() is not None:
+        return
+    future.result().unlink(missing_ok=True)
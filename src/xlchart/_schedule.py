@@ -0,0 +1,96 @@
+import json
+import re
+import statistics
+import zipfile
+from os import PathLike
+from pathlib import Path
+from typing import Final, Iterable, Optional
+
+from ._shard import _shard_key
+
+# 処理時間の見積もり（秒）
+# 履歴がある場合は実測値との比で補正する
+BASE_COST: Final[float] = 1.0
+COST_PER_MB: Final[float] = 0.5
+COST_PER_CHART: Final[float] = 0.3
+
+CHART_PART: Final[re.Pattern] = re.compile(r"^xl/charts/(chart|chartEx)\d+\.xml$")
+
+
+def _load_history(file_path: Optional[str | PathLike]) -> dict:
+    if file_path is None or not Path(file_path).exists():
+        return {}
+    with Path(file_path).open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_history(file_path: str | PathLike, history: dict):
+    with Path(file_path).open("w", encoding="utf-8", newline="\n") as f:
+        json.dump(history, f, indent=4, ensure_ascii=False, sort_keys=True)
+        f.write("\n")
+
+
+def _book_stats(book: Path) -> tuple[int, int]:
+    # グラフの数は ZIP の中央ディレクトリから数えるので中身は展開しない
+    size = book.stat().st_size
+    try:
+        with zipfile.ZipFile(book) as z:
+            charts = sum(1 for name in z.namelist() if CHART_PART.match(name))
+    except (OSError, zipfile.BadZipFile):
+        charts = 0
+    return size, charts
+
+
+def _model_cost(size: int, charts: int) -> float:
+    return BASE_COST + COST_PER_MB * size / (1024 * 1024) + COST_PER_CHART * charts
+
+
+def _history_scale(history: dict) -> float:
+    # 実測値と見積もりの比の中央値
+    ratios = [
+        h["seconds"] / _model_cost(h["size"], h.get("charts", 0))
+        for h in history.values()
+        if h.get("seconds") is not None and h.get("size") is not None
+    ]
+    return statistics.median(ratios) if ratios else 1.0
+
+
+def _estimate_cost(key: str, size: int, charts: int, history: dict, scale: float = 1.0) -> float:
+
+    # 同じファイルの実測値があればそれを使う
+    item = history.get(key)
+    if item is not None and item.get("size") == size:
+        return item["seconds"]
+
+    return _model_cost(size, charts) * scale
+
+
+def _order_by_cost(
+    target_books: Iterable[Path],
+    base_dir: Optional[Path],
+    history: dict,
+    stats: Optional[dict[Path, tuple[int, int]]] = None,
+) -> list[Path]:
+
+    # 時間のかかりそうなワークブックから処理する
+    # 並列に処理する場合は，大きなワークブックが最後に残って全体の終了が遅れるのを防ぐ
+    # stats が指定された場合はファイルサイズとグラフの数を記録する
+    # base_dir が指定されない場合は履歴をパスそのもので引く
+
+    scale = _history_scale(history)
+    costs = dict()
+    for book in target_books:
+        try:
+            size, charts = _book_stats(book)
+        except OSError:
+            size, charts = 0, 0
+        if stats is not None:
+            stats[book] = (size, charts)
+        key = _shard_key(book, base_dir) if base_dir is not None else book.as_posix()
+        costs[book] = _estimate_cost(key, size, charts, history, scale)
+
+    return sorted(costs, key=lambda b: (-costs[b], b))
+
+
+def _record_timing(history: dict, key: str, size: int, charts: int, seconds: float):
+    history[key] = {"size": size, "charts": charts, "seconds": seconds}
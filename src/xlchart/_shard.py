@@ -0,0 +1,33 @@
+import hashlib
+from os import PathLike
+from pathlib import Path
+
+
+def _parse_shard(value: str) -> tuple[int, int]:
+    # "i/N" 形式（i は 1 から N）
+    try:
+        index, count = (int(v) for v in value.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid value for --shard: {value}")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid value for --shard: {value}")
+    return index, count
+
+
+def _shard_key(file_path: str | PathLike, base_dir: str | PathLike) -> str:
+    # マシンごとにマウント先が異なっても同じになるように，ディレクトリからの相対パスを使う
+    return Path(file_path).relative_to(base_dir).as_posix()
+
+
+def _shard_of(key: str, count: int) -> int:
+    # hash() は実行ごとに値が変わるので使わない
+    digest = hashlib.sha1(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def _in_shard(key: str, index: int, count: int) -> bool:
+    return _shard_of(key, count) == index
+
+
+def _manifest_name(command: str, index: int, count: int) -> str:
+    return f"{command}.shard-{index}-of-{count}.json"
@@ -0,0 +1,92 @@
+import time
+from os import PathLike
+from pathlib import Path
+from typing import Iterator
+
+# Excel が作成するロックファイルの接頭辞
+LOCK_PREFIX = "~$"
+
+
+def _watch_dir(
+    dir_path: str | PathLike,
+    pattern: str = "*.xlsx",
+    interval: float = 1.0,
+    settle: float = 2.0,
+) -> Iterator[Path]:
+
+    # ディレクトリを監視し，新規作成または更新されたワークブックを返す
+    # 書き込み途中のファイルを避けるため，サイズと更新日時が settle 秒変化しなくなるまで待つ
+    # 起動時に存在するファイルも新規作成されたものとして扱う
+
+    dir_path = Path(dir_path)
+    done: dict[Path, tuple[int, int]] = dict()
+    pending: dict[Path, tuple[tuple[int, int], float]] = dict()
+
+    wait, close = _change_waiter(dir_path)
+    try:
+        while True:
+            now = time.monotonic()
+            for path in sorted(dir_path.glob(pattern)):
+                if path.name.startswith(LOCK_PREFIX):
+                    continue
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                sig = (st.st_size, st.st_mtime_ns)
+                if done.get(path) == sig:
+                    continue
+                if path not in pending or pending[path][0] != sig:
+                    pending[path] = (sig, now)
+
+            for path, (sig, since) in sorted(pending.items()):
+                if now - since < settle:
+                    continue
+                # Excel で開かれている間はロックファイルが存在する
+                if path.with_name(LOCK_PREFIX + path.name).exists():
+                    continue
+                if not path.exists():
+                    del pending[path]
+                    continue
+                del pending[path]
+                done[path] = sig
+                yield path
+
+            # 保留中のファイルがある場合は settle 経過後に再確認する
+            wait(min(interval, settle) if pending else interval)
+    finally:
+        close()
+
+
+def _change_waiter(dir_path: Path):
+
+    # ディレクトリの変更通知を待つ関数を返す
+    # 変更通知が利用できない場合はポーリングする
+
+    try:
+        import win32con
+        import win32event
+        import win32file
+
+        handle = win32file.FindFirstChangeNotification(
+            str(dir_path),
+            False,
+            win32con.FILE_NOTIFY_CHANGE_FILE_NAME
+            | win32con.FILE_NOTIFY_CHANGE_SIZE
+            | win32con.FILE_NOTIFY_CHANGE_LAST_WRITE,
+        )
+    except Exception:
+
+        def sleep(timeout: float):
+            time.sleep(timeout)
+
+        return sleep, lambda: None
+
+    def wait(timeout: float):
+        if win32event.WaitForSingleObject(handle, int(timeout * 1000)) == win32event.WAIT_OBJECT_0:
+            win32file.FindNextChangeNotification(handle)
+
+    def close():
+        win32file.FindCloseChangeNotification(handle)
+
+    return wait, close
@@ -1,71 +1,124 @@
 import json
 import sys
+import threading
 from os import PathLike
 from pathlib import Path
-from typing import Final, Sequence
+from typing import AsyncIterator, Callable, Final, Iterable, Iterator, Optional, Sequence
 
 import tomli
 
 from . import xlcparse
+from ._archive import _is_archive
+from ._batch import BATCH_USAGE, _pop_batch_options, _run_batch
+from ._cli import _pop_flag
+from ._match import match_charts
+from ._metrics import Metrics, _timer
+from ._pool import _aiter_books, _iter_books
 from ._xlapp import _init_excel, _new_excel, _quit_excel
 
 AXIS: Final[dict[int, str]] = {1: "x-axis", 2: "y-axis", 3: "series-axis"}
 
 RESULT_TYPE = tuple[str, str, str, bool]
+RESULT_HEADER: Final[tuple[str, ...]] = ("Chart", "Property", "Value", "Result")
+
+# --match で対応付けたグラフを出力する行（採点対象ではない）
+MATCH_PROPERTY: Final[str] = "matched-chart"
 
 
 def usage():
     cmd = Path(__file__).name
-    print(f"Usage: {cmd} <workbook> <answer>")
-    print(f"       {cmd} <directory> <answer>")
+    print(f"Usage: {cmd} [--match] <workbook> <answer> [<answer> ...]")
+    print(f"       {cmd} [--match] {BATCH_USAGE}")
+    print(f"       {' ' * len(cmd)} <directory|archive.zip> <answer> [<answer> ...]")
 
 
 def main():
 
-    if len(sys.argv) != 3:
+    args = sys.argv[1:]
+
+    # グラフ名ではなく内容でグラフを対応付ける
+    match = _pop_flag(args, "--match")
+
+    # ディレクトリを処理する場合のオプション
+    try:
+        options = _pop_batch_options(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
         usage()
         sys.exit(1)
 
-    target_path = Path(sys.argv[1])
-    answer_path = Path(sys.argv[2])
+    if len(args) < 2:
+        usage()
+        sys.exit(1)
+
+    target_path = Path(args[0])
+    answer_paths = [Path(a) for a in args[1:]]
 
     # 採点基準
+    # 複数指定された場合は最も得点の高いものを採用する
     try:
-        answer = load_answer(answer_path)
+        answers = [load_answer(p) for p in answer_paths]
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         return
 
     # 採点対象がファイルの場合は標準出力に出力
-    if target_path.is_file():
+    if target_path.is_file() and not _is_archive(target_path):
         try:
-            for r in check_file(target_path, answer):
-                print("\t".join(map(str, r)))
+            index, result = check_file_best(target_path, answers, match)
+            for r in result:
+                print("\t".join(map(str, _format_result(r, answer_paths, index))))
         except Exception as e:
             print(f"Error: {e}", file=sys.stderr)
             return
         return
 
     # 採点対象がディレクトリの場合はファイルごとに結果を保存
-    if target_path.is_dir():
-        for target_book in target_path.glob("*.xlsx"):
-            print(target_book, file=sys.stderr)
-            try:
-                result = check_file(target_book, answer)
-                output = target_book.with_suffix(".tsv")
-                with output.open("w", encoding="utf-8", newline="\n") as f:
-                    f.write("\t".join(("Chart", "Property", "Value", "Result")))
-                    for r in result:
-                        f.write("\t".join(map(str, r)) + "\n")
-            except Exception as e:
-                print(f"Error: {e}", file=sys.stderr)
-                continue
+    # ZIP ファイルの場合は展開せず，ZIP ファイルと同じ名前のディレクトリにメンバーごとに結果を保存
+    if target_path.is_dir() or _is_archive(target_path):
+
+        def process(xl, target_book: Path, source_book: Path, metrics: Metrics):
+            _check_book(xl, target_book, answers, answer_paths, match, metrics, source_book)
+
+        try:
+            _run_batch("xlccheck", target_path, process, options)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
         return
 
     # 読み込めなかった場合はエラー
     print(f"Error: No such file or directory: {target_path}", file=sys.stderr)
 
 
+def _check_book(
+    xl,
+    target_book: Path,
+    answers: Sequence[dict],
+    answer_paths: Sequence[Path],
+    match: bool,
+    metrics: Optional[Metrics] = None,
+    source_book: Optional[Path] = None,
+):
+    # ワークブックの読み込みは 1 回だけ行い，すべての採点基準でチェックする
+    target = _load_target(xl, source_book or target_book, metrics)
+    with _timer(metrics, "check"):
+        index, result = check_best(target, answers, match)
+    output = target_book.with_suffix(".tsv")
+    with output.open("w", encoding="utf-8", newline="\n") as f:
+        f.write("\t".join(_format_result(RESULT_HEADER, answer_paths, None)) + "\n")
+        for r in result:
+            f.write("\t".join(map(str, _format_result(r, answer_paths, index))) + "\n")
+
+
+def _format_result(r: tuple, answer_paths: Sequence[Path], index: Optional[int]) -> tuple:
+    # 採点基準が 1 つの場合は従来どおりの形式で出力する
+    if len(answer_paths) == 1:
+        return r
+    if index is None:
+        return ("Answer", *r)
+    return (answer_paths[index].name, *r)
+
+
 def load_answer(file_path: str | PathLike) -> dict:
     p = Path(file_path)
     if p.suffix == ".toml":
@@ -90,13 +143,15 @@ def load_target(file_path: str | PathLike) -> dict:
             _quit_excel(xl)
 
 
-def _load_target(xl, file_path: str | PathLike) -> dict:
+def _load_target(xl, file_path: str | PathLike, metrics: Optional[Metrics] = None) -> dict:
     wb = None
     try:
-        wb = xl.Workbooks.Open(Path(file_path).resolve(), ReadOnly=True, UpdateLinks=False)
+        with _timer(metrics, "open"):
+            wb = xl.Workbooks.Open(Path(file_path).resolve(), ReadOnly=True, UpdateLinks=False)
         if wb is None:
             raise RuntimeError(f"Failed to open workbook: {file_path}")
-        data = xlcparse.parse_book(wb)
+        with _timer(metrics, "parse"):
+            data = xlcparse.parse_book(wb)
     finally:
         if wb is not None:
             wb.Close(SaveChanges=False)
@@ -104,20 +159,93 @@ def _load_target(xl, file_path: str | PathLike) -> dict:
     return data
 
 
-def check_file(workbook_path: str | PathLike, answer: dict) -> list[RESULT_TYPE]:
+def check_file(workbook_path: str | PathLike, answer: dict, match: bool = False) -> list[RESULT_TYPE]:
+    target = load_target(workbook_path)
+    return check(target, answer, match)
+
+
+def iter_check(
+    paths: Iterable[str | PathLike],
+    answer: dict,
+    workers: int = 1,
+    max_inflight: Optional[int] = None,
+    cancel: Optional[threading.Event] = None,
+    match: bool = False,
+    schedule: bool = False,
+) -> Iterator[tuple[Path, list[RESULT_TYPE] | Exception]]:
+
+    # ワークブックを採点し，終わったものから (path, 結果または例外) を返す
+    # Excel はワーカーごとに 1 回だけ起動する
+    return _iter_books(paths, _check_func(answer, match), workers, max_inflight, cancel, schedule)
+
+
+def aiter_check(
+    paths: Iterable[str | PathLike],
+    answer: dict,
+    workers: int = 1,
+    max_inflight: Optional[int] = None,
+    cancel: Optional[threading.Event] = None,
+    match: bool = False,
+    schedule: bool = False,
+) -> AsyncIterator[tuple[Path, list[RESULT_TYPE] | Exception]]:
+    return _aiter_books(paths, _check_func(answer, match), workers, max_inflight, cancel, schedule)
+
+
+def _check_func(answer: dict, match: bool) -> Callable[[object, Path], list[RESULT_TYPE]]:
+    def func(xl, path: Path) -> list[RESULT_TYPE]:
+        return check(_load_target(xl, path), answer, match)
+
+    return func
+
+
+def check_file_best(
+    workbook_path: str | PathLike, answers: Sequence[dict], match: bool = False
+) -> tuple[int, list[RESULT_TYPE]]:
     target = load_target(workbook_path)
-    return check(target, answer)
+    return check_best(target, answers, match)
 
 
-def check(target: dict, answer: dict) -> list[RESULT_TYPE]:
+def check_best(target: dict, answers: Sequence[dict], match: bool = False) -> tuple[int, list[RESULT_TYPE]]:
+    # すべての採点基準でチェックし，最も得点の高い採点基準の番号と結果を返す
+    results = check_variants(target, answers, match)
+    index = max(range(len(results)), key=lambda i: score(results[i]))
+    return index, results[index]
+
+
+def check_variants(target: dict, answers: Sequence[dict], match: bool = False) -> list[list[RESULT_TYPE]]:
+    return [check(target, answer, match) for answer in answers]
+
+
+def score(result: list[RESULT_TYPE]) -> tuple[float, int]:
+    # 採点基準ごとに項目数が異なるので正答率を優先し，同率の場合は正答数で比較する
+    # グラフの対応付けの行は採点しない
+    graded = [r for r in result if r[1] != MATCH_PROPERTY]
+    correct = sum(1 for r in graded if r[3])
+    if not graded:
+        return (0.0, 0)
+    return (correct / len(graded), correct)
+
+
+def check(target: dict, answer: dict, match: bool = False) -> list[RESULT_TYPE]:
 
     result = []
 
+    # グラフの対応付け
+    # match の場合は内容が最も近いグラフを対応付け，対応付けの結果も出力する
+    if match:
+        mapping = match_charts(target, answer)
+    else:
+        mapping = {chart_name: chart_name for chart_name in answer.keys()}
+
     # グラフごとにチェック
     for chart_name in answer.keys():
 
+        target_name = mapping.get(chart_name)
         answer_chart = answer.get(chart_name, {})
-        target_chart = target.get(chart_name, {})
+        target_chart = target.get(target_name, {}) if target_name is not None else {}
+
+        if match:
+            result.append((chart_name, MATCH_PROPERTY, target_name or "", ""))
 
         # プロパティごとにチェック
         for prop_name in answer_chart.keys():
@@ -1,27 +1,44 @@
 import json
 import sys
+import threading
 from os import PathLike
 from pathlib import Path
+from typing import AsyncIterator, Iterable, Iterator, Optional
 
 from . import xlcparse
+from ._archive import _is_archive
+from ._batch import BATCH_USAGE, _pop_batch_options, _run_batch
+from ._metrics import Metrics, _timer
+from ._pool import _aiter_books, _iter_books
 from ._xlapp import _init_excel, _new_excel, _quit_excel
 
 
 def usage():
     cmd = Path(__file__).name
     print(f"Usage: {cmd} <workbook>")
-    print(f"       {cmd} <directory>")
+    print(f"       {cmd} {BATCH_USAGE}")
+    print(f"       {' ' * len(cmd)} <directory|archive.zip>")
 
 
 def main():
 
-    if len(sys.argv) != 2:
+    args = sys.argv[1:]
+
+    # ディレクトリを処理する場合のオプション
+    try:
+        options = _pop_batch_options(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        usage()
+        sys.exit(1)
+
+    if len(args) != 1:
         usage()
         sys.exit(1)
 
-    target_path = Path(sys.argv[1]).resolve()
+    target_path = Path(args[0]).resolve()
 
-    if target_path.is_file():
+    if target_path.is_file() and not _is_archive(target_path):
         try:
             data = dump(target_path)
         except Exception as e:
@@ -30,34 +47,26 @@ def main():
         print(json.dumps(data, indent=4, ensure_ascii=False))
         return
 
-    if target_path.is_dir():
-        _init_excel()
-        xl = None
+    if target_path.is_dir() or _is_archive(target_path):
         try:
-            xl = _new_excel()
-            for target_book in target_path.glob("*.xlsx"):
-                print(target_book, file=sys.stderr)
-                try:
-                    data = _dump(xl, target_book)
-                except Exception as e:
-                    print(f"Error: {e}", file=sys.stderr)
-                    continue
-                output = target_book.with_suffix(".json")
-                with output.open("w", encoding="utf-8", newline="\n") as f:
-                    json.dump(data, f, indent=4, ensure_ascii=False)
-                    f.write("\n")
+            _run_batch("xlcdump", target_path, _dump_book, options)
         except Exception as e:
             print(f"Error: {e}", file=sys.stderr)
             sys.exit(1)
-        finally:
-            if xl is not None:
-                _quit_excel(xl)
         return
 
     print(f"Error: No such file or directory: {target_path}", file=sys.stderr)
     sys.exit(1)
 
 
+def _dump_book(xl, target_book: Path, source_book: Optional[Path] = None, metrics: Optional[Metrics] = None):
+    data = _dump(xl, source_book or target_book, metrics)
+    output = target_book.with_suffix(".json")
+    with output.open("w", encoding="utf-8", newline="\n") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+        f.write("\n")
+
+
 def dump(workbook_path: str | PathLike) -> dict:
     _init_excel()
     xl = None
@@ -69,13 +78,36 @@ def dump(workbook_path: str | PathLike) -> dict:
             _quit_excel(xl)
 
 
-def _dump(xl, workbook_path: str | PathLike) -> dict:
+def iter_dump(
+    paths: Iterable[str | PathLike],
+    workers: int = 1,
+    max_inflight: Optional[int] = None,
+    cancel: Optional[threading.Event] = None,
+    schedule: bool = False,
+) -> Iterator[tuple[Path, dict | Exception]]:
+    # ワークブックを読み込み，終わったものから (path, 結果または例外) を返す
+    return _iter_books(paths, _dump, workers, max_inflight, cancel, schedule)
+
+
+def aiter_dump(
+    paths: Iterable[str | PathLike],
+    workers: int = 1,
+    max_inflight: Optional[int] = None,
+    cancel: Optional[threading.Event] = None,
+    schedule: bool = False,
+) -> AsyncIterator[tuple[Path, dict | Exception]]:
+    return _aiter_books(paths, _dump, workers, max_inflight, cancel, schedule)
+
+
+def _dump(xl, workbook_path: str | PathLike, metrics: Optional[Metrics] = None) -> dict:
     wb = None
     try:
-        wb = xl.Workbooks.Open(Path(workbook_path).resolve(), ReadOnly=True, UpdateLinks=False)
+        with _timer(metrics, "open"):
+            wb = xl.Workbooks.Open(Path(workbook_path).resolve(), ReadOnly=True, UpdateLinks=False)
         if wb is None:
             raise RuntimeError(f"Failed to open workbook: {workbook_path}")
-        data = xlcparse.parse_book(wb)
+        with _timer(metrics, "parse"):
+            data = xlcparse.parse_book(wb)
     finally:
         if wb is not None:
             wb.Close(SaveChanges=False)
@@ -2,25 +2,39 @@ import re
 import sys
 from os import PathLike
 from pathlib import Path
+from typing import Optional
 
+from ._batch import BATCH_USAGE, _pop_batch_options, _run_batch
+from ._metrics import Metrics, _timer
 from ._xlapp import _init_excel, _new_excel, _quit_excel
 
 
 def usage():
     cmd = Path(__file__).name
     print(f"Usage: {cmd} <workbook> [dest_dir]")
-    print(f"       {cmd} <directory> [dest_dir]")
+    print(f"       {cmd} {BATCH_USAGE}")
+    print(f"       {' ' * len(cmd)} <directory> [dest_dir]")
 
 
 def main():
 
-    if len(sys.argv) < 2:
+    args = sys.argv[1:]
+
+    # ディレクトリを処理する場合のオプション
+    try:
+        options = _pop_batch_options(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
         usage()
         sys.exit(1)
 
-    target_path = Path(sys.argv[1]).resolve()
-    if len(sys.argv) > 2:
-        dest_path = Path(sys.argv[2])
+    if len(args) < 1:
+        usage()
+        sys.exit(1)
+
+    target_path = Path(args[0]).resolve()
+    if len(args) > 1:
+        dest_path = Path(args[1])
     elif target_path.is_file():
         dest_path = target_path.parent
     else:
@@ -31,9 +45,15 @@ def main():
         return
 
     if target_path.is_dir():
-        for target_book in target_path.glob("*.xlsx"):
-            print(target_book, file=sys.stderr)
-            export(target_book, dest_path)
+
+        def process(xl, target_book: Path, source_book: Path, metrics: Metrics):
+            # 監視モードでは再提出されたワークブックの画像を作り直す
+            _export(xl, target_book, dest_path, metrics, source_book, overwrite=options.watch)
+
+        try:
+            _run_batch("xlcexport", target_path, process, options, dest_path)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
         return
 
     print(f"Error: No such file or directory: {target_path}", file=sys.stderr)
@@ -50,7 +70,14 @@ def export(workbook_path: str | PathLike, dest_path: str | PathLike):
             _quit_excel(xl)
 
 
-def _export(xl, workbook_path: str | PathLike, dest_path: str | PathLike):
+def _export(
+    xl,
+    workbook_path: str | PathLike,
+    dest_path: str | PathLike,
+    metrics: Optional[Metrics] = None,
+    source_path: Optional[str | PathLike] = None,
+    overwrite: bool = False,
+):
 
     dest_dir = Path(dest_path)
     if dest_dir.exists() and not dest_dir.is_dir():
@@ -59,7 +86,8 @@ def _export(xl, workbook_path: str | PathLike, dest_path: str | PathLike):
 
     wb = None
     try:
-        wb = xl.Workbooks.Open(Path(workbook_path).resolve(), ReadOnly=True, UpdateLinks=False)
+        with _timer(metrics, "open"):
+            wb = xl.Workbooks.Open(Path(source_path or workbook_path).resolve(), ReadOnly=True, UpdateLinks=False)
         if wb is None:
             raise RuntimeError(f"Failed to open workbook: {workbook_path}")
 
@@ -67,6 +95,10 @@ def _export(xl, workbook_path: str | PathLike, dest_path: str | PathLike):
         dest_dir = dest_dir.joinpath(Path(workbook_path).stem)
         if not dest_dir.exists():
             dest_dir.mkdir()
+        elif overwrite:
+            # 前回出力した画像を削除する（削除されたグラフの画像も残さない）
+            for f in dest_dir.glob("*.png"):
+                f.unlink()
 
         # 埋め込みグラフ
         for sheet in wb.Worksheets:
@@ -76,7 +108,8 @@ def _export(xl, workbook_path: str | PathLike, dest_path: str | PathLike):
                 if dest_file.exists():
                     print(f"Error: File already exists: {str(dest_file)}", file=sys.stderr)
                     continue
-                obj.Chart.Export(dest_file)
+                with _timer(metrics, "export"):
+                    obj.Chart.Export(dest_file)
 
         # グラフシート
         for chart in wb.Charts:
@@ -85,7 +118,8 @@ def _export(xl, workbook_path: str | PathLike, dest_path: str | PathLike):
             if dest_file.exists():
                 print(f"Error: File already exists: {str(dest_file)}", file=sys.stderr)
                 continue
-            chart.Export(dest_file)
+            with _timer(metrics, "export"):
+                chart.Export(dest_file)
     finally:
         if wb is not None:
             wb.Close(SaveChanges=False)
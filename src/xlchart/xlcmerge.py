@@ -0,0 +1,155 @@
+import json
+import sys
+from os import PathLike
+from pathlib import Path
+from typing import Sequence
+
+from ._shard import _shard_of
+
+
+def usage():
+    cmd = Path(__file__).name
+    print(f"Usage: {cmd} <output> <manifest> [<manifest> ...]")
+
+
+def main():
+
+    if len(sys.argv) < 3:
+        usage()
+        sys.exit(1)
+
+    output_path = Path(sys.argv[1])
+    manifest_paths = [Path(a) for a in sys.argv[2:]]
+
+    try:
+        manifests = [load_manifest(p) for p in manifest_paths]
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    # 欠けている担当分や重複があれば結合しない
+    problems = verify(manifests)
+    if problems:
+        for p in problems:
+            print(f"Error: {p}", file=sys.stderr)
+        sys.exit(1)
+
+    # 処理に失敗したワークブックは結果に含めない
+    for manifest in manifests:
+        for key, item in manifest["workbooks"].items():
+            if item.get("error") is not None:
+                print(f"Failed: {key}: {item['error']}", file=sys.stderr)
+
+    try:
+        merge(manifests, output_path)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def load_manifest(file_path: str | PathLike) -> dict:
+    p = Path(file_path)
+    with p.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    # 出力ファイルは manifest と同じディレクトリにある
+    data["directory"] = str(p.resolve().parent)
+    return data
+
+
+def verify(manifests: Sequence[dict]) -> list[str]:
+
+    problems = []
+
+    if not manifests:
+        return ["No manifest"]
+
+    first = manifests[0]
+    for key in ("command", "shards", "total"):
+        values = sorted(set(str(m.get(key)) for m in manifests))
+        if len(values) > 1:
+            problems.append(f"Inconsistent {key}: {', '.join(values)}")
+    if problems:
+        return problems
+
+    count = first["shards"]
+
+    # 担当分がすべて揃っているか
+    shards = [m["shard"] for m in manifests]
+    for i in range(1, count + 1):
+        n = shards.count(i)
+        if n == 0:
+            problems.append(f"Missing shard: {i}/{count}")
+        elif n > 1:
+            problems.append(f"Duplicate shard: {i}/{count}")
+
+    # ワークブックが重複していないか，正しい担当分で処理されたか
+    seen = dict()
+    for m in manifests:
+        for key in m["workbooks"]:
+            if key in seen:
+                problems.append(f"Duplicate workbook: {key} (shard {seen[key]} and {m['shard']})")
+                continue
+            seen[key] = m["shard"]
+            if _shard_of(key, count) != m["shard"]:
+                problems.append(f"Workbook in wrong shard: {key} (shard {m['shard']})")
+
+    # 処理されなかったワークブックがないか
+    if first["total"] is not None and len(seen) != first["total"]:
+        problems.append(f"Missing workbooks: {len(seen)} of {first['total']} processed")
+
+    return problems
+
+
+def merge(manifests: Sequence[dict], output_path: str | PathLike):
+
+    command = manifests[0]["command"]
+
+    workbooks = dict()
+    for m in manifests:
+        for key, item in m["workbooks"].items():
+            if item.get("error") is None:
+                workbooks[key] = Path(m["directory"]).joinpath(key)
+
+    # xlccheck: ワークブックの列を追加してひとつの TSV にする
+    if command == "xlccheck":
+        with Path(output_path).open("w", encoding="utf-8", newline="\n") as out:
+            header = False
+            for key, book in sorted(workbooks.items()):
+                with book.with_suffix(".tsv").open("r", encoding="utf-8") as f:
+                    lines = f.read().splitlines()
+                if not lines:
+                    continue
+                if not header:
+                    out.write("\t".join(("Workbook", lines[0])) + "\n")
+                    header = True
+                for line in lines[1:]:
+                    out.write("\t".join((key, line)) + "\n")
+        return
+
+    # xlcdump: ワークブックごとの JSON をひとつにまとめる
+    if command == "xlcdump":
+        data = dict()
+        for key, book in sorted(workbooks.items()):
+            with book.with_suffix(".json").open("r", encoding="utf-8") as f:
+                data[key] = json.load(f)
+        with Path(output_path).open("w", encoding="utf-8", newline="\n") as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+            f.write("\n")
+        return
+
+    # xlcexport: 画像はそのままなので manifest だけをまとめる
+    data = dict()
+    data["command"] = command
+    data["shards"] = manifests[0]["shards"]
+    data["total"] = manifests[0]["total"]
+    data["workbooks"] = dict()
+    for m in sorted(manifests, key=lambda m: m["shard"]):
+        for key, item in m["workbooks"].items():
+            data["workbooks"][key] = dict(item, shard=m["shard"], directory=m["directory"])
+    with Path(output_path).open("w", encoding="utf-8", newline="\n") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
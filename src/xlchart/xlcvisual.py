@@ -0,0 +1,184 @@
+import sys
+from os import PathLike
+from pathlib import Path
+from typing import Final, Sequence
+
+from ._cli import _pop_option
+
+# NumPy と Pillow は追加パッケージ（pip install xlchart[visual]）
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:
+    np = None
+    Image = None
+
+# 縮小後の画像サイズ
+HASH_SIZE: Final[int] = 8
+DCT_SIZE: Final[int] = 32
+VECTOR_SIZE: Final[int] = 32
+
+RESULT_HEADER: Final[tuple[str, ...]] = ("Workbook", "Chart", "Score", "Hash", "Vector")
+
+VISUAL_RESULT_TYPE = tuple[str, str, float, int, float]
+
+
+def usage():
+    cmd = Path(__file__).name
+    print(f"Usage: {cmd} [--top <n>] <answer_dir> <export_dir>")
+
+
+def main():
+
+    args = sys.argv[1:]
+
+    # 上位 n 件だけを出力する
+    try:
+        top = _pop_option(args, "--top")
+        if top is not None and (not top.isdigit() or int(top) < 1):
+            raise ValueError(f"Invalid value for --top: {top}")
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        usage()
+        sys.exit(1)
+
+    if len(args) != 2:
+        usage()
+        sys.exit(1)
+
+    answer_dir = Path(args[0])
+    export_dir = Path(args[1])
+
+    for p in (answer_dir, export_dir):
+        if not p.is_dir():
+            print(f"Error: Not a directory: {p}", file=sys.stderr)
+            sys.exit(1)
+
+    try:
+        result = compare_dir(answer_dir, export_dir)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if top is not None:
+        result = result[: int(top)]
+
+    print("\t".join(RESULT_HEADER))
+    for r in result:
+        print("\t".join((r[0], r[1], f"{r[2]:.4f}", str(r[3]), f"{r[4]:.4f}")))
+
+
+def compare_dir(answer_dir: str | PathLike, export_dir: str | PathLike) -> list[VISUAL_RESULT_TYPE]:
+
+    # answer_dir: 正解のワークブックを xlcexport した画像のディレクトリ
+    # export_dir: 採点対象を xlcexport したディレクトリ（ワークブックごとのサブディレクトリ）
+    # 正解と見た目が大きく異なるグラフから順に返す
+
+    if np is None or Image is None:
+        raise ImportError("xlcvisual requires NumPy and Pillow: pip install xlchart[visual]")
+
+    answer_files = sorted(Path(answer_dir).glob("*.png"))
+    if not answer_files:
+        raise ValueError(f"No chart images: {answer_dir}")
+
+    books = sorted(p for p in Path(export_dir).iterdir() if p.is_dir() and p.resolve() != Path(answer_dir).resolve())
+
+    # クラス全体の画像をまとめて読み込む
+    files = list()
+    owners = list()
+    for i, book in enumerate(books):
+        for f in sorted(book.glob("*.png")):
+            files.append(f)
+            owners.append(i)
+
+    answer_images = load_images(answer_files)
+    answer_hashes = phash(answer_images)
+    answer_vectors = vectors(answer_images)
+
+    if files:
+        images = load_images(files)
+        hashes = phash(images)
+        vecs = vectors(images)
+    else:
+        hashes = np.zeros((0, HASH_SIZE * HASH_SIZE), dtype=bool)
+        vecs = np.zeros((0, VECTOR_SIZE * VECTOR_SIZE))
+
+    # すべての組み合わせの距離を一度に計算する
+    # hash_dist: (画像数, 正解の画像数) のハミング距離
+    # vec_dist: (画像数, 正解の画像数) のユークリッド距離（正規化済みなので 0 から 2）
+    h = hashes.astype(np.float64)
+    a = answer_hashes.astype(np.float64)
+    hash_dist = np.rint(h @ (1 - a).T + (1 - h) @ a.T).astype(int)
+    sq = (vecs**2).sum(axis=1)[:, None] + (answer_vectors**2).sum(axis=1)[None, :] - 2 * vecs @ answer_vectors.T
+    vec_dist = np.sqrt(np.clip(sq, 0, None))
+    score = (hash_dist / (HASH_SIZE * HASH_SIZE) + vec_dist / 2) / 2
+
+    owners_arr = np.asarray(owners, dtype=int)
+    names = [f.name for f in files]
+
+    result = list()
+    for i, book in enumerate(books):
+        rows = np.flatnonzero(owners_arr == i)
+        for j, answer_file in enumerate(answer_files):
+            # 同じ名前のグラフがなければ最も近いグラフと比較する
+            same = [r for r in rows if names[r] == answer_file.name]
+            if same:
+                r = same[0]
+            elif len(rows) > 0:
+                r = rows[np.argmin(score[rows, j])]
+            else:
+                result.append((book.name, answer_file.stem, 1.0, HASH_SIZE * HASH_SIZE, 2.0))
+                continue
+            result.append(
+                (book.name, answer_file.stem, float(score[r, j]), int(hash_dist[r, j]), float(vec_dist[r, j]))
+            )
+
+    return sorted(result, key=lambda r: (-r[2], r[0], r[1]))
+
+
+def load_images(files: Sequence[str | PathLike]) -> "np.ndarray":
+    # グレースケールに変換して DCT_SIZE x DCT_SIZE に縮小する
+    images = np.empty((len(files), DCT_SIZE, DCT_SIZE), dtype=np.float64)
+    for i, f in enumerate(files):
+        with Image.open(f) as im:
+            # 透過部分は白にする
+            if im.mode in ("RGBA", "LA", "P"):
+                im = im.convert("RGBA")
+                bg = Image.new("RGBA", im.size, (255, 255, 255, 255))
+                im = Image.alpha_composite(bg, im)
+            im = im.convert("L").resize((DCT_SIZE, DCT_SIZE), Image.LANCZOS)
+            images[i] = np.asarray(im, dtype=np.float64)
+    return images
+
+
+def phash(images: "np.ndarray") -> "np.ndarray":
+    # DCT の低周波成分が中央値より大きいかどうかで HASH_SIZE x HASH_SIZE ビットのハッシュを作る
+    d = _dct_matrix(DCT_SIZE)
+    coef = np.einsum("ij,njk,lk->nil", d, images, d)[:, :HASH_SIZE, :HASH_SIZE]
+    coef = coef.reshape(len(images), -1)
+    # 直流成分は明るさだけなので中央値の計算から除く
+    median = np.median(coef[:, 1:], axis=1, keepdims=True)
+    return coef > median
+
+
+def vectors(images: "np.ndarray") -> "np.ndarray":
+    # VECTOR_SIZE x VECTOR_SIZE に平均して縮小し，平均 0，ノルム 1 に正規化する
+    n = len(images)
+    k = DCT_SIZE // VECTOR_SIZE
+    small = images.reshape(n, VECTOR_SIZE, k, VECTOR_SIZE, k).mean(axis=(2, 4)).reshape(n, -1)
+    small = small - small.mean(axis=1, keepdims=True)
+    norm = np.linalg.norm(small, axis=1, keepdims=True)
+    return np.divide(small, norm, out=np.zeros_like(small), where=norm > 0)
+
+
+def _dct_matrix(n: int) -> "np.ndarray":
+    # DCT-II の変換行列
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    d = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    d[0] /= np.sqrt(2)
+    return d
+
+
+if __name__ == "__main__":
+    main()